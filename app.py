@@ -1,12 +1,109 @@
-from flask import Flask, render_template, request, jsonify
-import requests
+from quart import Quart, render_template, request, jsonify, url_for
+import httpx
+import orjson
 from geopy.geocoders import Nominatim
-from itertools import permutations
+from geopy.extra.rate_limiter import AsyncRateLimiter
+import asyncio
+import diskcache
+import hashlib
+import os
+import re
 import time
+import uuid
 import folium
 import json
+import numpy as np
+from tsp_solver import optimal_tour
 
-app = Flask(__name__)
+app = Quart(__name__)
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+GEOCODE_CACHE_TTL = 30 * 24 * 3600  # 30 days
+
+# Rendered route maps, served as static files and pruned by age and count
+MAPS_DIR = os.path.join(app.static_folder, 'maps')
+os.makedirs(MAPS_DIR, exist_ok=True)
+MAP_MAX_AGE = 24 * 3600  # 1 day since last use
+MAX_SAVED_MAPS = 500
+
+_MARKER_COLORS = ('red', 'blue', 'green', 'purple', 'orange', 'darkred', 'lightred', 'beige')
+
+# Unit conversions from OSRM seconds and meters
+_INV_60 = 1.0 / 60
+_INV_3600 = 1.0 / 3600
+_INV_1000 = 1.0 / 1000
+_INV_MILE = 1.0 / 1609.34
+
+# "123 Main Street, New York, NY 10001" -> street, city, state, postal code
+US_ADDRESS_PATTERN = re.compile(
+    r'^(?P<street>[^,]+),\s*(?P<city>[^,]+),\s*(?P<state>[A-Za-z][A-Za-z .]*?)\s*(?P<postalcode>\d{5}(?:-\d{4})?)?'
+    r'(?:,\s*(?:USA|US|United States))?$',
+    re.IGNORECASE
+)
+
+def parse_us_address(address):
+    """Split a US-style address into Nominatim structured query fields, or None"""
+    match = US_ADDRESS_PATTERN.match(address.strip())
+    if not match:
+        return None
+    
+    components = {key: value.strip() for key, value in match.groupdict().items() if value}
+    components['country'] = 'US'
+    return components
+
+def group_duplicates(values):
+    """Group equal values (rows for 2-D input), numbering groups by first appearance
+    
+    Returns (first_index, group): the index of each group's first value and the
+    group number of every value.
+    """
+    _, first_index, inverse = np.unique(values, axis=0, return_index=True, return_inverse=True)
+    
+    # np.unique numbers groups in sorted order; renumber them by first appearance
+    order = np.argsort(first_index)
+    renumber = np.empty_like(order)
+    renumber[order] = np.arange(len(order))
+    return first_index[order], renumber[inverse.ravel()]
+
+def touch_saved_map(path):
+    """Refresh a saved map's age so pruning keeps it; False if there is none"""
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+def prune_maps():
+    """Delete saved maps unused for MAP_MAX_AGE, then the oldest beyond MAX_SAVED_MAPS"""
+    maps = [
+        (entry.stat().st_mtime, entry.path)
+        for entry in os.scandir(MAPS_DIR)
+        if entry.is_file() and entry.name.endswith('.html')
+    ]
+    maps.sort(reverse=True)
+    cutoff = time.time() - MAP_MAX_AGE
+    for rank, (mtime, path) in enumerate(maps):
+        if rank >= MAX_SAVED_MAPS or mtime < cutoff:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+class RequestThrottle:
+    """Space calls at least min_interval seconds apart across all tasks"""
+    
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._gate = asyncio.Semaphore(1)
+        self._last_call = float('-inf')
+    
+    async def wait(self):
+        """Wait until this task may send the next request"""
+        async with self._gate:
+            elapsed = time.monotonic() - self._last_call
+            if elapsed < self.min_interval:
+                await asyncio.sleep(self.min_interval - elapsed)
+            self._last_call = time.monotonic()
 
 class RouteOptimizer:
     def __init__(self):
@@ -16,28 +113,66 @@ class RouteOptimizer:
             domain='nominatim.openstreetmap.org',
             scheme='https'
         )
-        self.osrm_url = "http://router.project-osrm.org/route/v1/driving/"
+        # Enforce Nominatim's 1 request/second policy across all lookups and
+        # tasks; the RateLimiter only adds retries on top
+        self.nominatim_throttle = RequestThrottle(1.0)
+        self.geocode = AsyncRateLimiter(
+            self._throttled_geocode,
+            min_delay_seconds=0,
+            max_retries=2,
+            error_wait_seconds=2.0,
+            swallow_exceptions=False
+        )
+        
+        # One HTTP/2 client multiplexes all OSRM calls over shared connections
+        self.client = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=3,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+            ),
+            timeout=10.0
+        )
+        
+        # Persistent caches so repeated addresses and stop sets skip the network
+        self.geo_cache = diskcache.Cache(os.path.join(CACHE_DIR, 'geo'))
+        self.osrm_cache = diskcache.Cache(os.path.join(CACHE_DIR, 'osrm'))
+    
+    async def _throttled_geocode(self, *args, **kwargs):
+        # geopy's Nominatim client is blocking; keep it off the event loop
+        await self.nominatim_throttle.wait()
+        return await asyncio.to_thread(self.geolocator.geocode, *args, **kwargs)
+    
+    async def geocode_address(self, address):
+        """Geocode an address, serving repeated addresses from the on-disk cache"""
+        key = address.strip().lower()
+        cached = self.geo_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        result = await self._lookup_address(address)
+        if result['success']:
+            self.geo_cache.set(key, result, expire=GEOCODE_CACHE_TTL)
+        return result
     
-    def geocode_address(self, address):
+    async def _lookup_address(self, address):
         """Enhanced geocoding with multiple services for exact house numbers"""
         # Clean and format address
         address = address.strip()
         
-        # Try multiple geocoding approaches
-        geocoding_attempts = [
-            # Exact address with detailed parameters
-            {'query': address, 'params': {'exactly_one': True, 'addressdetails': True, 'limit': 1}},
-            # With country specified
-            {'query': f"{address}, United States", 'params': {'exactly_one': True, 'addressdetails': True}},
-            # With USA appended
-            {'query': f"{address}, USA", 'params': {'exactly_one': True, 'addressdetails': True}},
-            # Structured query if possible
-            {'query': address, 'params': {'exactly_one': True, 'addressdetails': True, 'extratags': True}}
-        ]
+        geocoding_attempts = []
+        
+        # Structured query resolves house numbers in a single request
+        components = parse_us_address(address)
+        if components:
+            geocoding_attempts.append({'query': components, 'params': {'exactly_one': True, 'addressdetails': True}})
+        
+        # Freeform fallback with the country spelled out
+        geocoding_attempts.append({'query': f"{address}, USA", 'params': {'exactly_one': True, 'addressdetails': True}})
         
         for attempt in geocoding_attempts:
             try:
-                location = self.geolocator.geocode(attempt['query'], **attempt['params'])
+                location = await self.geocode(attempt['query'], **attempt['params'])
                 if location and location.latitude and location.longitude:
                     # Verify it's a reasonable location (not in ocean, etc.)
                     if -90 <= location.latitude <= 90 and -180 <= location.longitude <= 180:
@@ -47,19 +182,18 @@ class RouteOptimizer:
                             'display_name': location.address,
                             'success': True
                         }
-                time.sleep(0.5)  # Rate limiting between attempts
             except Exception as e:
                 continue
         
         # Try OpenCage as backup (free tier)
         try:
-            return self._try_opencage_geocoding(address)
-        except:
+            return await self._try_opencage_geocoding(address)
+        except Exception:
             pass
             
         return {'success': False, 'error': f'Could not geocode address: {address}'}
     
-    def _try_opencage_geocoding(self, address):
+    async def _try_opencage_geocoding(self, address):
         """Backup geocoding using OpenCage (requires API key for production)"""
         # For demo purposes, try a different Nominatim instance
         backup_geolocator = Nominatim(
@@ -69,7 +203,9 @@ class RouteOptimizer:
         )
         
         try:
-            location = backup_geolocator.geocode(
+            await self.nominatim_throttle.wait()
+            location = await asyncio.to_thread(
+                backup_geolocator.geocode,
                 address, 
                 exactly_one=True, 
                 addressdetails=True,
@@ -82,47 +218,56 @@ class RouteOptimizer:
                     'display_name': location.address,
                     'success': True
                 }
-        except:
+        except Exception:
             pass
             
         return {'success': False, 'error': 'Backup geocoding failed'}
     
-    def get_route_info(self, coord1, coord2, transport_mode='driving'):
-        """Get route info for different transport modes"""
-        # OSRM profiles
+    async def get_route_geometry(self, coord1, coord2, transport_mode='driving', hint1=None, hint2=None):
+        """Get route geometry and leg distance for different transport modes
+        
+        Hints from a previous table request let OSRM skip snapping the endpoints.
+        """
         profiles = {
             'driving': 'driving',
-            'cycling': 'cycling', 
-            'walking': 'foot'
+            'cycling': 'cycling',
+            'walking': 'foot',
+            'bus': 'driving'  # Bus uses driving routes
         }
         
         profile = profiles.get(transport_mode, 'driving')
-        url = f"http://router.project-osrm.org/route/v1/{profile}/{coord1[1]},{coord1[0]};{coord2[1]},{coord2[0]}"
+        url = f"https://router.project-osrm.org/route/v1/{profile}/{coord1[1]},{coord1[0]};{coord2[1]},{coord2[0]}"
+        url += "?overview=full&geometries=geojson"
+        if hint1 or hint2:
+            # Appended raw: OSRM expects literal semicolons between hints
+            url += f"&hints={hint1 or ''};{hint2 or ''}"
         
         try:
-            response = requests.get(url, params={"overview": "false"}, timeout=10)
-            data = response.json()
+            response = await self.client.get(url)
+            data = orjson.loads(response.content)
             
             if data["code"] == "Ok":
+                # GeoJSON is lon,lat; a reversed column view gives folium lat,lon without copying
                 route = data["routes"][0]
-                duration = route["duration"]
-                distance = route["distance"]
-                
-                # Adjust for bus (assume 20% slower than car due to stops)
-                if transport_mode == 'bus':
-                    duration *= 1.2
-                
+                coordinates = np.asarray(route["geometry"]["coordinates"], dtype=np.float64)
                 return {
-                    'duration': duration,
-                    'distance': distance,
+                    'geometry': coordinates[:, ::-1],
+                    'distance': route["distance"],
                     'success': True
                 }
-            return {'success': False, 'duration': float('inf'), 'distance': float('inf')}
-        except:
-            return {'success': False, 'duration': float('inf'), 'distance': float('inf')}
+            return {'success': False, 'geometry': None, 'distance': float('inf')}
+        # ValueError covers orjson.JSONDecodeError and malformed arrays;
+        # anything else (including cancellation) propagates
+        except (httpx.HTTPError, ValueError, KeyError, IndexError, TypeError):
+            return {'success': False, 'geometry': None, 'distance': float('inf')}
     
-    def get_route_geometry(self, coord1, coord2, transport_mode='driving'):
-        """Get route geometry for different transport modes"""
+    async def get_matrix(self, coords, transport_mode='driving', need_distance=True):
+        """Get duration and distance matrices for all stops in a single OSRM table request
+        
+        Returns (durations, distances, hints). Without need_distance only durations
+        are requested and distances is None. hints holds OSRM's snapped-location
+        hint for each stop, for reuse in route geometry requests.
+        """
         profiles = {
             'driving': 'driving',
             'cycling': 'cycling',
@@ -130,53 +275,65 @@ class RouteOptimizer:
             'bus': 'driving'  # Bus uses driving routes
         }
         
+        # Keep stop order in the key: matrix rows and columns follow it
+        annotations = "duration,distance" if need_distance else "duration"
+        cache_key = hashlib.sha1(
+            json.dumps([list(coord) for coord in coords] + [transport_mode, annotations, 'hints']).encode()
+        ).hexdigest()
+        cached = self.osrm_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         profile = profiles.get(transport_mode, 'driving')
-        url = f"http://router.project-osrm.org/route/v1/{profile}/{coord1[1]},{coord1[0]};{coord2[1]},{coord2[0]}"
+        locations = ';'.join(f"{lon},{lat}" for lat, lon in coords)
+        url = f"https://router.project-osrm.org/table/v1/{profile}/{locations}"
         
         try:
-            response = requests.get(url, params={"overview": "full", "geometries": "geojson"}, timeout=10)
-            data = response.json()
+            response = await self.client.get(url, params={"annotations": annotations, "generate_hints": "true"})
+            data = orjson.loads(response.content)
             
             if data["code"] == "Ok":
-                coordinates = data["routes"][0]["geometry"]["coordinates"]
-                return [[lat, lon] for lon, lat in coordinates]
-            return None
-        except:
-            return None
-    
-    def solve_tsp(self, matrix, optimize_by='time'):
-        """Solve TSP optimizing by time or distance with proper metric selection"""
-        n = len(matrix)
-        min_cost = float('inf')
-        best_route = None
-        
-        # Use correct metric key
-        metric_key = 'duration' if optimize_by == 'time' else 'distance'
-        
-        for perm in permutations(range(1, n)):
-            route = [0] + list(perm) + [0]
-            cost = 0
-            
-            for i in range(len(route) - 1):
-                start_idx = route[i]
-                end_idx = route[i + 1]
-                cost += matrix[start_idx][end_idx][metric_key]
-            
-            if cost < min_cost:
-                min_cost = cost
-                best_route = route
+                # Unroutable pairs come back as null, which parses to NaN
+                durations = np.nan_to_num(np.array(data["durations"], dtype=np.float64), nan=np.inf)
+                distances = None
+                if need_distance:
+                    distances = np.nan_to_num(np.array(data["distances"], dtype=np.float64), nan=np.inf)
+                
+                # Adjust for bus (assume 20% slower than car due to stops)
+                if transport_mode == 'bus':
+                    durations *= 1.2
+                
+                hints = [source.get("hint") for source in data["sources"]]
+                
+                self.osrm_cache.set(cache_key, (durations, distances, hints))
+                return durations, distances, hints
+        # ValueError covers orjson.JSONDecodeError and malformed arrays;
+        # anything else (including cancellation) propagates
+        except (httpx.HTTPError, ValueError, KeyError, IndexError, TypeError):
+            pass
         
-        return best_route, min_cost
+        # Same fallback as a failed route lookup: every leg is unreachable
+        unreachable = np.full((len(coords), len(coords)), np.inf)
+        np.fill_diagonal(unreachable, 0)
+        return unreachable, unreachable.copy() if need_distance else None, [None] * len(coords)
+    
+    def solve_tsp(self, cost):
+        """Solve TSP over a duration or distance matrix using Held-Karp dynamic programming"""
+        return optimal_tour(cost)
 
 optimizer = RouteOptimizer()
 
+@app.after_serving
+async def close_client():
+    await optimizer.client.aclose()
+
 @app.route('/')
-def index():
-    return render_template('index.html')
+async def index():
+    return await render_template('index.html')
 
 @app.route('/optimize', methods=['POST'])
-def optimize_route():
-    data = request.json
+async def optimize_route():
+    data = await request.get_json()
     addresses = data.get('addresses', [])
     optimize_by = data.get('optimize_by', 'time')  # 'time' or 'distance'
     transport_mode = data.get('transport_mode', 'driving')  # 'driving', 'cycling', 'walking', 'bus'
@@ -184,105 +341,151 @@ def optimize_route():
     if len(addresses) < 2:
         return jsonify({'error': 'At least 2 addresses required'})
     
-    # Geocode addresses
+    # Geocode each distinct address once; the shared throttle keeps Nominatim at 1 request/second
+    first_address, address_group = group_duplicates([addr.strip().lower() for addr in addresses])
+    unique_addresses = [addresses[address_idx] for address_idx in first_address]
+    results = await asyncio.gather(*(optimizer.geocode_address(addr) for addr in unique_addresses))
+    
     coordinates = []
     geocoded_addresses = []
     
-    for addr in addresses:
-        result = optimizer.geocode_address(addr)
+    for addr, result in zip(unique_addresses, results):
         if result['success']:
             coordinates.append((result['lat'], result['lon']))
             geocoded_addresses.append(result['display_name'])
         else:
             return jsonify({'error': f"Could not geocode: {addr}"})
-        time.sleep(0.5)  # Rate limiting
-    
-    # Build distance/time matrix with proper structure
-    n = len(coordinates)
-    matrix = [[{'duration': 0, 'distance': 0} for _ in range(n)] for _ in range(n)]
     
-    for i in range(n):
-        for j in range(i + 1, n):
-            if i != j:
-                route_info = optimizer.get_route_info(coordinates[i], coordinates[j], transport_mode)
-                matrix[i][j] = matrix[j][i] = {
-                    'duration': route_info['duration'],
-                    'distance': route_info['distance']
-                }
-                time.sleep(0.1)
+    # Merge distinct addresses that geocode to the same point (~1 m)
+    first_stop, stop_group = group_duplicates(np.round(coordinates, 5))
+    coordinates = [coordinates[i] for i in first_stop]
+    geocoded_addresses = [geocoded_addresses[i] for i in first_stop]
+    stop_of_address = stop_group[address_group]
     
-    # Solve TSP
-    optimal_route, total_cost = optimizer.solve_tsp(matrix, optimize_by)
+    if len(coordinates) < 2:
+        return jsonify({'error': 'At least 2 distinct addresses required'})
     
-    # Calculate total time and distance from optimal route
-    total_time = 0
-    total_distance = 0
+    # Build time (and, when optimizing by it, distance) matrices with one OSRM table request
+    durations, distances, hints = await optimizer.get_matrix(
+        coordinates, transport_mode, need_distance=optimize_by != 'time'
+    )
     
-    for i in range(len(optimal_route) - 1):
-        start_idx = optimal_route[i]
-        end_idx = optimal_route[i + 1]
-        total_time += matrix[start_idx][end_idx]['duration']
-        total_distance += matrix[start_idx][end_idx]['distance']
+    # Solve TSP on the matrix for the selected metric
+    cost = durations if optimize_by == 'time' else distances
+    optimal_route, total_cost = optimizer.solve_tsp(cost)
     
-    # Create map
-    center_lat = sum(coord[0] for coord in coordinates) / len(coordinates)
-    center_lon = sum(coord[1] for coord in coordinates) / len(coordinates)
+    # The map depends only on the stops, their order and the transport mode,
+    # so identical requests share one saved page
+    map_id = hashlib.sha1(
+        json.dumps([coordinates, geocoded_addresses, optimal_route, transport_mode]).encode()
+    ).hexdigest()
+    map_saved = touch_saved_map(os.path.join(MAPS_DIR, f'{map_id}.html'))
     
-    m = folium.Map(location=[center_lat, center_lon], zoom_start=12)
+    # Fetch actual road geometry for every leg concurrently, only when the map
+    # has to be rendered
+    legs = list(zip(optimal_route[:-1], optimal_route[1:]))
+    leg_routes = []
+    if not map_saved:
+        pairs = [
+            (coordinates[start_idx], coordinates[end_idx], transport_mode, hints[start_idx], hints[end_idx])
+            for start_idx, end_idx in legs
+        ]
+        leg_routes = await asyncio.gather(*(optimizer.get_route_geometry(*pair) for pair in pairs))
     
-    colors = ['red', 'blue', 'green', 'purple', 'orange', 'darkred', 'lightred', 'beige']
-    for i, (addr, coord) in enumerate(zip(geocoded_addresses, coordinates)):
-        folium.Marker(
-            coord,
-            popup=f"Stop {i+1}: {addr}",
-            tooltip=f"Stop {i+1}",
-            icon=folium.Icon(color=colors[i % len(colors)])
-        ).add_to(m)
+    # Calculate total time and distance from optimal route
+    route = np.asarray(optimal_route)
+    total_time = float(durations[route[:-1], route[1:]].sum())
+    if distances is None and (map_saved or not all(leg['success'] for leg in leg_routes)):
+        # No leg geometry was fetched, or a failed leg has no distance; use a
+        # (disk-cached) table request that includes distances instead
+        _, distances, _ = await optimizer.get_matrix(coordinates, transport_mode, need_distance=True)
+    if distances is not None:
+        total_distance = float(distances[route[:-1], route[1:]].sum())
+    else:
+        # The leg geometry responses already carry each leg's distance
+        total_distance = sum(leg['distance'] for leg in leg_routes)
     
-    # Draw route with actual road geometry
-    for i in range(len(optimal_route) - 1):
-        start_idx = optimal_route[i]
-        end_idx = optimal_route[i + 1]
+    if not map_saved:
+        # Create map
+        center_lat, center_lon = np.mean(coordinates, axis=0).tolist()
         
-        # Get actual route geometry
-        route_coords = optimizer.get_route_geometry(coordinates[start_idx], coordinates[end_idx], transport_mode)
+        m = folium.Map(location=[center_lat, center_lon], zoom_start=12)
         
-        if route_coords:
-            folium.PolyLine(
-                route_coords,
-                color='#FF4444',
-                weight=4,
-                opacity=0.8
+        for i in range(len(coordinates)):
+            folium.Marker(
+                coordinates[i],
+                popup=f"Stop {i+1}: {geocoded_addresses[i]}",
+                tooltip=f"Stop {i+1}",
+                icon=folium.Icon(color=_MARKER_COLORS[i % len(_MARKER_COLORS)])
             ).add_to(m)
-        else:
-            # Fallback to straight line if route geometry fails
-            folium.PolyLine([
-                coordinates[start_idx],
-                coordinates[end_idx]
-            ], color='#FF4444', weight=4, opacity=0.8, dashArray='5, 5').add_to(m)
+        
+        # Draw route with actual road geometry
+        for (start_idx, end_idx), leg in zip(legs, leg_routes):
+            if leg['success']:
+                folium.PolyLine(
+                    leg['geometry'],
+                    color='#FF4444',
+                    weight=4,
+                    opacity=0.8
+                ).add_to(m)
+            else:
+                # Fallback to straight line if route geometry fails
+                folium.PolyLine([
+                    coordinates[start_idx],
+                    coordinates[end_idx]
+                ], color='#FF4444', weight=4, opacity=0.8, dashArray='5, 5').add_to(m)
+        
+        # A map with straight-line fallbacks is not reused; the next request retries the legs
+        if not all(leg['success'] for leg in leg_routes):
+            map_id = uuid.uuid4().hex
+        
+        # Save the map as a static page instead of inlining megabytes of HTML in the
+        # response; write then rename so concurrent requests never serve a partial file
+        map_path = os.path.join(MAPS_DIR, f'{map_id}.html')
+        partial_path = f'{map_path}.{uuid.uuid4().hex}.tmp'
+        await asyncio.to_thread(m.save, partial_path)
+        os.replace(partial_path, map_path)
+        await asyncio.to_thread(prune_maps)
     
-    map_html = m._repr_html_()
+    map_url = url_for('static', filename=f'maps/{map_id}.html')
     
     # Prepare route details
-    route_details = []
-    for i, stop_idx in enumerate(optimal_route[:-1]):
-        route_details.append({
-            'step': i + 1,
+    route_details = [
+        {
+            'step': step,
             'address': geocoded_addresses[stop_idx],
-            'coordinates': coordinates[stop_idx]
-        })
+            'coordinates': coordinates[stop_idx],
+            'input_addresses': [addresses[i] for i in np.flatnonzero(stop_of_address == stop_idx)]
+        }
+        for step, stop_idx in enumerate(optimal_route[:-1], start=1)
+    ]
+    
+    # Convert units for the report, rounding each precision group in one pass
+    total_minutes, optimization_minutes = np.round([total_time * _INV_60, total_cost * _INV_60], 1).tolist()
+    total_hours, total_km, total_miles, optimization_km = np.round([
+        total_time * _INV_3600,
+        total_distance * _INV_1000,
+        total_distance * _INV_MILE,
+        total_cost * _INV_1000
+    ], 2).tolist()
+    
+    # JSON has no Infinity: report totals over unreachable legs as null
+    total_minutes, optimization_minutes, total_hours, total_km, total_miles, optimization_km = [
+        value if np.isfinite(value) else None
+        for value in (total_minutes, optimization_minutes, total_hours, total_km, total_miles, optimization_km)
+    ]
     
     return jsonify({
         'success': True,
         'route': route_details,
-        'total_time_minutes': round(total_time / 60, 1),
-        'total_time_hours': round(total_time / 3600, 2),
-        'total_distance_km': round(total_distance / 1000, 2),
-        'total_distance_miles': round(total_distance / 1609.34, 2),
+        'total_time_minutes': total_minutes,
+        'total_time_hours': total_hours,
+        'total_distance_km': total_km,
+        'total_distance_miles': total_miles,
         'optimized_by': optimize_by.title(),
         'transport_mode': transport_mode.title(),
-        'optimization_value': round(total_cost / 60, 1) if optimize_by == 'time' else round(total_cost / 1000, 2),
-        'map_html': map_html
+        'optimization_value': optimization_minutes if optimize_by == 'time' else optimization_km,
+        'map_url': map_url
     })
 
 if __name__ == '__main__':
@@ -4,15 +4,26 @@ Debug script to test optimization accuracy
 """
 
 import requests
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from geopy.geocoders import Nominatim
 from itertools import permutations
+import numpy as np
 import time
+from tsp_solver import optimal_tour
+
+# Reuse keep-alive connections for all OSRM calls
+session = requests.Session()
+adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=Retry(total=3, backoff_factor=0.3))
+session.mount('http://', adapter)
+session.mount('https://', adapter)
 
 def get_route_info(coord1, coord2):
     url = f"http://router.project-osrm.org/route/v1/driving/{coord1[1]},{coord1[0]};{coord2[1]},{coord2[0]}"
     try:
-        response = requests.get(url, params={"overview": "false"}, timeout=10)
-        data = response.json()
+        response = session.get(url, params={"overview": "false"}, timeout=10)
+        data = orjson.loads(response.content)
         if data["code"] == "Ok":
             route = data["routes"][0]
             return {
@@ -36,15 +47,17 @@ def test_optimization():
     print("Testing Route Optimization")
     print("=" * 40)
     
-    # Build matrix
+    # Build duration and distance matrices
     n = len(coordinates)
-    matrix = [[{'duration': 0, 'distance': 0} for _ in range(n)] for _ in range(n)]
+    durations = np.zeros((n, n))
+    distances = np.zeros((n, n))
     
     for i in range(n):
         for j in range(i + 1, n):
             if i != j:
                 info = get_route_info(coordinates[i], coordinates[j])
-                matrix[i][j] = matrix[j][i] = info
+                durations[i, j] = durations[j, i] = info['duration']
+                distances[i, j] = distances[j, i] = info['distance']
                 print(f"{names[i]} -> {names[j]}: {info['duration']/60:.1f}min, {info['distance']/1000:.1f}km")
                 time.sleep(0.5)
     
@@ -53,13 +66,13 @@ def test_optimization():
         print(f"\nOptimizing by {optimize_by}:")
         print("-" * 20)
         
-        metric_key = 'duration' if optimize_by == 'time' else 'distance'
+        cost_matrix = durations if optimize_by == 'time' else distances
         min_cost = float('inf')
         best_route = None
         
         for perm in permutations(range(1, n)):
             route = [0] + list(perm) + [0]
-            cost = sum(matrix[route[i]][route[i+1]][metric_key] for i in range(len(route)-1))
+            cost = cost_matrix[route[:-1], route[1:]].sum()
             
             route_names = [names[i] for i in route[:-1]]
             cost_display = f"{cost/60:.1f}min" if optimize_by == 'time' else f"{cost/1000:.1f}km"
@@ -72,6 +85,12 @@ def test_optimization():
         best_names = [names[i] for i in best_route[:-1]]
         best_display = f"{min_cost/60:.1f}min" if optimize_by == 'time' else f"{min_cost/1000:.1f}km"
         print(f"BEST: {' -> '.join(best_names)} = {best_display}")
+        
+        # Cross-check the Held-Karp solver against the brute force enumeration
+        hk_route, hk_cost = optimal_tour(cost_matrix)
+        hk_names = [names[i] for i in hk_route[:-1]]
+        status = "MATCH" if np.isclose(hk_cost, min_cost) else "MISMATCH"
+        print(f"HELD-KARP: {' -> '.join(hk_names)} ({status})")
 
 if __name__ == "__main__":
     test_optimization()
\ No newline at end of file
@@ -5,16 +5,27 @@ Solves TSP using real-world addresses with geocoding and routing APIs
 """
 
 import requests
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import folium
 from geopy.geocoders import Nominatim
-from itertools import permutations
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import time
+from tsp_solver import optimal_tour
 
 class DeliveryRouter:
     def __init__(self):
         self.geolocator = Nominatim(user_agent="delivery_router")
         self.osrm_base_url = "http://router.project-osrm.org/route/v1/driving/"
         
+        # Reuse keep-alive connections for all OSRM calls
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=Retry(total=3, backoff_factor=0.3))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
     def geocode_addresses(self, addresses):
         """Convert addresses to coordinates using Nominatim"""
         coordinates = []
@@ -36,58 +47,46 @@ class DeliveryRouter:
                 
         return coordinates
     
-    def get_travel_time(self, coord1, coord2):
-        """Get travel time between two coordinates using OSRM"""
-        url = f"{self.osrm_base_url}{coord1[1]},{coord1[0]};{coord2[1]},{coord2[0]}"
-        params = {"overview": "false", "steps": "false"}
+    def build_distance_matrix(self, coordinates):
+        """Build matrix of travel times between all points with one OSRM table request"""
+        n = len(coordinates)
+        locations = ';'.join(f"{lon},{lat}" for lat, lon in coordinates)
+        url = f"http://router.project-osrm.org/table/v1/driving/{locations}"
         
+        print("Building distance matrix...")
         try:
-            response = requests.get(url, params=params, timeout=10)
-            data = response.json()
+            response = self.session.get(url, params={"annotations": "duration"}, timeout=10)
+            data = orjson.loads(response.content)
             
             if data["code"] == "Ok":
-                return data["routes"][0]["duration"]  # seconds
+                # Unroutable pairs come back as null, which parses to NaN
+                matrix = np.nan_to_num(np.array(data["durations"], dtype=np.float64), nan=np.inf)
             else:
                 print(f"OSRM error: {data.get('message', 'Unknown error')}")
-                return float('inf')
+                matrix = np.full((n, n), np.inf)
+                np.fill_diagonal(matrix, 0)
         except Exception as e:
-            print(f"Error getting travel time: {e}")
-            return float('inf')
-    
-    def build_distance_matrix(self, coordinates):
-        """Build matrix of travel times between all points"""
-        n = len(coordinates)
-        matrix = [[0] * n for _ in range(n)]
+            print(f"Error getting travel times: {e}")
+            matrix = np.full((n, n), np.inf)
+            np.fill_diagonal(matrix, 0)
         
-        print("Building distance matrix...")
         for i in range(n):
             for j in range(i + 1, n):
-                travel_time = self.get_travel_time(coordinates[i], coordinates[j])
-                matrix[i][j] = matrix[j][i] = travel_time
-                print(f"Distance {i}-{j}: {travel_time:.1f}s")
-                time.sleep(0.1)  # Rate limiting
+                print(f"Distance {i}-{j}: {matrix[i][j]:.1f}s")
                 
         return matrix
     
-    def solve_tsp_brute_force(self, distance_matrix, start_index=0):
-        """Solve TSP using brute force for guaranteed optimal solution"""
+    def solve_tsp(self, distance_matrix, start_index=0):
+        """Solve TSP using Held-Karp dynamic programming for guaranteed optimal solution"""
         n = len(distance_matrix)
-        if n > 8:
-            print("Warning: Brute force may be slow for >8 locations")
         
-        # Generate all possible routes (excluding start point)
-        other_points = [i for i in range(n) if i != start_index]
-        min_cost = float('inf')
-        best_route = None
+        # Relabel stops so the start point is index 0
+        order = [start_index] + [i for i in range(n) if i != start_index]
+        cost = np.asarray(distance_matrix, dtype=np.float64)[np.ix_(order, order)]
         
         print("Solving TSP...")
-        for perm in permutations(other_points):
-            route = [start_index] + list(perm) + [start_index]
-            cost = sum(distance_matrix[route[i]][route[i+1]] for i in range(len(route)-1))
-            
-            if cost < min_cost:
-                min_cost = cost
-                best_route = route
+        route, min_cost = optimal_tour(cost)
+        best_route = [order[i] for i in route]
         
         return best_route, min_cost
     
@@ -97,8 +96,8 @@ class DeliveryRouter:
         params = {"overview": "full", "geometries": "geojson"}
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            data = response.json()
+            response = self.session.get(url, params=params, timeout=10)
+            data = orjson.loads(response.content)
             
             if data["code"] == "Ok":
                 return data["routes"][0]["geometry"]["coordinates"]
@@ -126,19 +125,19 @@ class DeliveryRouter:
                 icon=folium.Icon(color=color)
             ).add_to(m)
         
+        # Fetch route lines for every leg in parallel
+        legs = list(zip(optimal_route[:-1], optimal_route[1:]))
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            leg_coords = list(executor.map(
+                lambda leg: self.get_route_coordinates(coordinates[leg[0]], coordinates[leg[1]]),
+                legs
+            ))
+        
         # Draw route lines
-        for i in range(len(optimal_route) - 1):
-            start_idx = optimal_route[i]
-            end_idx = optimal_route[i + 1]
-            
-            route_coords = self.get_route_coordinates(
-                coordinates[start_idx], 
-                coordinates[end_idx]
-            )
-            
+        for (start_idx, end_idx), route_coords in zip(legs, leg_coords):
             if route_coords:
-                # Convert lon,lat to lat,lon for folium
-                folium_coords = [[lat, lon] for lon, lat in route_coords]
+                # Convert lon,lat to lat,lon for folium with a reversed column view
+                folium_coords = np.asarray(route_coords, dtype=np.float64)[:, ::-1]
                 folium.PolyLine(
                     folium_coords,
                     color='red',
@@ -195,7 +194,7 @@ def main():
     distance_matrix = router.build_distance_matrix(coordinates)
     
     # Step 3: Solve TSP
-    optimal_route, total_time = router.solve_tsp_brute_force(distance_matrix)
+    optimal_route, total_time = router.solve_tsp(distance_matrix)
     
     # Step 4: Display results
     print("\n" + "="*50)
@@ -5,10 +5,20 @@ Enter addresses and get optimal route with visualization
 """
 
 import requests
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import folium
 from geopy.geocoders import Nominatim
-from itertools import permutations
+import numpy as np
 import time
+from tsp_solver import optimal_tour
+
+# Reuse keep-alive connections for all OSRM calls
+session = requests.Session()
+adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=Retry(total=3, backoff_factor=0.3))
+session.mount('http://', adapter)
+session.mount('https://', adapter)
 
 def geocode_address(address):
     """Convert single address to coordinates"""
@@ -21,30 +31,24 @@ def geocode_address(address):
     except:
         return None
 
-def get_travel_time(coord1, coord2):
-    """Get travel time between coordinates using OSRM"""
-    url = f"http://router.project-osrm.org/route/v1/driving/{coord1[1]},{coord1[0]};{coord2[1]},{coord2[0]}"
+def get_travel_times(coordinates):
+    """Get travel times between all coordinates with one OSRM table request"""
+    locations = ';'.join(f"{lon},{lat}" for lat, lon in coordinates)
+    url = f"http://router.project-osrm.org/table/v1/driving/{locations}"
     try:
-        response = requests.get(url, params={"overview": "false"}, timeout=10)
-        data = response.json()
-        return data["routes"][0]["duration"] if data["code"] == "Ok" else float('inf')
+        response = session.get(url, params={"annotations": "duration"}, timeout=10)
+        data = orjson.loads(response.content)
+        if data["code"] == "Ok":
+            return np.nan_to_num(np.array(data["durations"], dtype=np.float64), nan=np.inf)
     except:
-        return float('inf')
+        pass
+    matrix = np.full((len(coordinates), len(coordinates)), np.inf)
+    np.fill_diagonal(matrix, 0)
+    return matrix
 
 def solve_tsp(distance_matrix):
-    """Solve TSP using brute force"""
-    n = len(distance_matrix)
-    min_cost = float('inf')
-    best_route = None
-    
-    for perm in permutations(range(1, n)):
-        route = [0] + list(perm) + [0]
-        cost = sum(distance_matrix[route[i]][route[i+1]] for i in range(len(route)-1))
-        if cost < min_cost:
-            min_cost = cost
-            best_route = route
-    
-    return best_route, min_cost
+    """Solve TSP using Held-Karp dynamic programming"""
+    return optimal_tour(distance_matrix)
 
 def create_map(addresses, coordinates, route):
     """Create interactive map"""
@@ -105,14 +109,11 @@ def main():
     # Build distance matrix
     print("\n🗺️  Calculating distances...")
     n = len(coordinates)
-    matrix = [[0] * n for _ in range(n)]
+    matrix = get_travel_times(coordinates)
     
     for i in range(n):
         for j in range(i + 1, n):
-            travel_time = get_travel_time(coordinates[i], coordinates[j])
-            matrix[i][j] = matrix[j][i] = travel_time
-            print(f"Distance {i+1}-{j+1}: {travel_time/60:.1f} min")
-            time.sleep(0.1)
+            print(f"Distance {i+1}-{j+1}: {matrix[i][j]/60:.1f} min")
     
     # Solve TSP
     print("\n🧮 Finding optimal route...")
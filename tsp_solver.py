@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+TSP solvers shared by the web app and the command-line scripts
+"""
+
+from functools import lru_cache
+import threading
+
+import numpy as np
+from numba import njit, prange
+
+# fastmath without the no-NaN/no-inf assumptions: unreachable legs are inf
+FASTMATH_FLAGS = {'nsz', 'arcp', 'contract', 'afn', 'reassoc'}
+
+# Largest stop count solved exactly; larger inputs use nearest neighbor + 2-opt
+EXACT_MAX_STOPS = 11
+
+# Numba's default workqueue threading layer aborts on concurrent parallel
+# launches, and callers may solve from several threads
+_PARALLEL_LOCK = threading.Lock()
+
+
+@njit(cache=True)
+def subsets_with_popcount(bits, size):
+    """All bitmasks over `bits` bits with exactly `size` bits set, in increasing order"""
+    count = 1
+    for i in range(size):
+        count = count * (bits - i) // (i + 1)
+    subsets = np.empty(count, dtype=np.int64)
+
+    # Gosper's hack: step to the next larger integer with the same popcount
+    x = (1 << size) - 1
+    for i in range(count):
+        subsets[i] = x
+        c = x & -x
+        r = x + c
+        x = (((r ^ x) >> 2) // c) | r
+    return subsets
+
+
+@njit(cache=True, fastmath=FASTMATH_FLAGS, parallel=True)
+def held_karp(cost):
+    """Solve TSP exactly with the Held-Karp bitmask DP in O(n^2 * 2^n)
+
+    Tours start and end at stop 0. Returns (route, total_cost) where route
+    is an int32 array of stop indices like [0, 2, 1, 0].
+
+    The DP tables are float32/int8 (5 bytes per cell) so they stay cache
+    resident; total_cost is re-summed from the float64 matrix along the
+    chosen route. int8 parents limit this to fewer than 128 stops.
+    """
+    n = cost.shape[0]
+    route = np.zeros(n + 1, dtype=np.int32)
+    if n < 2:
+        return route[:n + 1], 0.0
+
+    full = (1 << n) - 1
+    compact_cost = cost.astype(np.float32)
+    dp = np.full((1 << n, n), np.float32(np.inf), dtype=np.float32)
+    parent = np.full((1 << n, n), np.int8(-1), dtype=np.int8)
+
+    # Paths that leave the depot straight for stop k
+    for k in range(1, n):
+        dp[1 | (1 << k), k] = compact_cost[0, k]
+        parent[1 | (1 << k), k] = 0
+
+    # Fill one popcount layer at a time: a layer only reads the one below it,
+    # so its subsets are independent and can be spread across cores
+    for size in range(2, n):
+        layer = subsets_with_popcount(n - 1, size)
+        for index in prange(layer.shape[0]):
+            # Shift the non-depot stops up one bit and add the depot
+            subset = (layer[index] << 1) | 1
+            for k in range(1, n):
+                if not (subset >> k) & 1:
+                    continue
+                prev = subset ^ (1 << k)
+                best = np.float32(np.inf)
+                best_j = -1
+                for j in range(1, n):
+                    if (prev >> j) & 1:
+                        candidate = dp[prev, j] + compact_cost[j, k]
+                        if best_j < 0 or candidate < best:
+                            best = candidate
+                            best_j = j
+                dp[subset, k] = best
+                parent[subset, k] = best_j
+
+    # Close the loop back to the depot
+    best = np.float32(np.inf)
+    last = -1
+    for k in range(1, n):
+        candidate = dp[full, k] + compact_cost[k, 0]
+        if last < 0 or candidate < best:
+            best = candidate
+            last = k
+
+    subset = full
+    k = last
+    for position in range(n - 1, 0, -1):
+        route[position] = k
+        prev = np.int64(parent[subset, k])
+        subset ^= 1 << k
+        k = prev
+
+    # Report the cost at full precision
+    total_cost = 0.0
+    for position in range(n):
+        total_cost += cost[route[position], route[position + 1]]
+
+    return route, total_cost
+
+
+# Compile once at import so JIT time stays off the request path
+held_karp(np.zeros((2, 2)))
+
+
+def tour_cost(cost, route):
+    """Total cost of following route through the cost matrix"""
+    route = np.asarray(route)
+    return float(cost[route[:-1], route[1:]].sum())
+
+
+def nearest_neighbor(cost, start=0):
+    """Build a closed tour by always moving to the cheapest unvisited stop"""
+    n = len(cost)
+    visited = np.zeros(n, dtype=bool)
+    visited[start] = True
+    tour = [start]
+    for _ in range(n - 1):
+        candidates = np.flatnonzero(~visited)
+        nearest = int(candidates[np.argmin(cost[tour[-1], candidates])])
+        visited[nearest] = True
+        tour.append(nearest)
+    tour.append(start)
+    return tour
+
+
+def two_opt(tour, cost):
+    """Polish a closed tour by reversing segments until no reversal improves it
+
+    Reversal gains account for the reversed interior legs, so this stays
+    correct for asymmetric matrices such as OSRM durations.
+    """
+    tour = np.array(tour)
+    n = len(tour) - 1
+    improved = True
+    while improved:
+        improved = False
+        # Prefix sums of each leg travelled forwards and backwards
+        forward = np.concatenate(([0.0], np.cumsum(cost[tour[:-1], tour[1:]])))
+        backward = np.concatenate(([0.0], np.cumsum(cost[tour[1:], tour[:-1]])))
+        for i in range(n - 2):
+            # Replace legs a->b and c->d with a->c and b->d, reversing b..c
+            j = np.arange(i + 2, n)
+            a, b = tour[i], tour[i + 1]
+            c, d = tour[j], tour[j + 1]
+            delta = (cost[a, c] + cost[b, d] - cost[a, b] - cost[c, d]
+                     + (backward[j] - backward[i + 1]) - (forward[j] - forward[i + 1]))
+            delta = np.where(np.isnan(delta), np.inf, delta)
+            best = int(np.argmin(delta))
+            if delta[best] < -1e-9:
+                tour[i + 1:j[best] + 1] = tour[i + 1:j[best] + 1][::-1].copy()
+                improved = True
+                break
+    return tour.tolist()
+
+
+def _solve(cost):
+    n = len(cost)
+
+    # Two or three stops have only one tour per direction, nothing to search
+    if n <= 3:
+        route = list(range(n)) + [0]
+        if n == 3 and tour_cost(cost, [0, 2, 1, 0]) < tour_cost(cost, route):
+            route = [0, 2, 1, 0]
+        return route, tour_cost(cost, route)
+
+    # Held-Karp's 2^n states get expensive past this size; use a heuristic
+    if n > EXACT_MAX_STOPS:
+        route = two_opt(nearest_neighbor(cost), cost)
+        return route, tour_cost(cost, route)
+
+    with _PARALLEL_LOCK:
+        route, total_cost = held_karp(cost)
+    return route.tolist(), float(total_cost)
+
+
+@lru_cache(maxsize=64)
+def _solve_cached(cost_bytes, n):
+    # Copy so numba sees the same writable array type it compiled for at import
+    cost = np.frombuffer(cost_bytes, dtype=np.float64).reshape(n, n).copy()
+    route, total_cost = _solve(cost)
+    return tuple(route), total_cost
+
+
+def optimal_tour(cost):
+    """Solve TSP for a square cost matrix, memoized on the matrix contents
+
+    Exact (Held-Karp) up to EXACT_MAX_STOPS stops, nearest neighbor plus
+    2-opt beyond that.
+    """
+    cost = np.ascontiguousarray(cost, dtype=np.float64)
+    route, total_cost = _solve_cached(cost.tobytes(), len(cost))
+    return list(route), total_cost